@@ -3,10 +3,16 @@
 # This software may be used and distributed according to the terms of the
 # GNU General Public License version 2.
 
+import concurrent.futures
+import dataclasses
+import functools
+import itertools
+import multiprocessing
 import time
 from dataclasses import dataclass
 
-from edenscm import commands, mdiff, registrar
+from edenscm import commands, mdiff, registrar, scmutil
+from edenscm.pycompat import decodeutf8
 from edenscm.simplemerge import Merge3Text, wordmergemode
 
 
@@ -28,59 +34,59 @@ class BenchStats:
     octopus_merges: int = 0
     criss_cross_merges: int = 0
 
+    def __iadd__(self, other):
+        for field in dataclasses.fields(self):
+            name = field.name
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
 
-@command("smerge_bench", commands.dryrunopts)
+
+@command(
+    "smerge_bench",
+    [("j", "jobs", 1, "number of worker processes")] + commands.dryrunopts,
+)
 def smerge_bench(ui, repo, **opts):
     merge_commits = repo.dageval(lambda dag: dag.merges(dag.all()))
     ui.write(f"len(merge_commits)={len(merge_commits)}\n")
+    run_benches(ui, repo, merge_commits, opts.get("jobs") or 1)
+
+
+@command(
+    "smerge_batch",
+    [
+        ("r", "rev", [], "merge commits to benchmark"),
+        ("j", "jobs", 1, "number of worker processes"),
+    ],
+    "[[-r] REV]...",
+)
+def smerge_batch(ui, repo, *revs, **opts):
+    """benchmark merging the given merge commits
 
+    Like smerge_bench, but only for the given merge commits, in the given
+    order. Without revisions, read them from stdin, one per line.
+
+    Non-merge commits are skipped.
+    """
+    specs = list(revs) + opts.get("rev", [])
+    if not specs:
+        lines = decodeutf8(ui.fin.read()).splitlines()
+        specs = [line.strip() for line in lines if line.strip()]
+    revs = scmutil.revrange(repo, specs)
+    merge_commits = list(repo.nodes("%ld and merge()", revs))
+    ui.write(f"len(merge_commits)={len(merge_commits)}\n")
+    run_benches(ui, repo, merge_commits, opts.get("jobs") or 1)
+
+
+def run_benches(ui, repo, merge_commits, jobs):
     for m3merger in [SmartMerge3Text, Merge3Text]:
         ui.write(f"\n============== {m3merger.__name__} ==============\n")
         start = time.time()
         bench_stats = BenchStats()
-        for i, merge_commit in enumerate(merge_commits, start=1):
-            parents = repo.dageval(lambda: parentnames(merge_commit))
-
-            if len(parents) != 2:
-                # skip octopus merge
-                #    a
-                #  / | \
-                # b  c  d
-                #  \ | /
-                #    e
-                bench_stats.octopus_merges += 1
-                continue
-
-            p1, p2 = parents
-            gcas = repo.dageval(lambda: gcaall([p1, p2]))
-            if len(gcas) != 1:
-                # skip criss cross merge
-                #    a
-                #   / \
-                #  b1  c1
-                #  |\ /|
-                #  | X |
-                #  |/ \|
-                #  b2  c2
-                bench_stats.criss_cross_merges += 1
-                continue
-
-            basectx = repo[gcas[0]]
-            p1ctx, p2ctx = repo[p1], repo[p2]
-            mergectx = repo[merge_commit]
-
-            for filepath in mergectx.files():
-                if all(filepath in ctx for ctx in [basectx, p1ctx, p2ctx]):
-                    merge_file(
-                        repo,
-                        p1ctx,
-                        p2ctx,
-                        basectx,
-                        mergectx,
-                        filepath,
-                        m3merger,
-                        bench_stats,
-                    )
+        results = bench_merges(repo, merge_commits, m3merger, jobs)
+        for i, (merge_stats, output) in enumerate(results, start=1):
+            bench_stats += merge_stats
+            for text in output:
+                ui.write(text)
 
             if i % 100 == 0:
                 ui.write(f"{i} {bench_stats}\n")
@@ -89,33 +95,197 @@ def smerge_bench(ui, repo, **opts):
         ui.write(f"Execution time: {time.time() - start:.2f} seconds\n")
 
 
+def bench_merges(repo, merge_commits, m3merger, jobs):
+    """Yield (BenchStats, output) for each merge commit, in order.
+
+    With more than one job, merges are spread over a pool of forked worker
+    processes. Forking lets workers reuse the opened repo and this module,
+    which is loaded from a path and cannot be imported by a spawned process.
+    """
+    if jobs <= 1:
+        readdata = filedatareader(repo)
+        for merge_commit in merge_commits:
+            yield bench_merge(repo, merge_commit, m3merger, readdata)
+        return
+
+    global _workerrepo
+    _workerrepo = repo
+    mpcontext = multiprocessing.get_context("fork")
+    with concurrent.futures.ProcessPoolExecutor(
+        jobs, mp_context=mpcontext, initializer=_initworker
+    ) as executor:
+        yield from executor.map(
+            _benchworker, list(merge_commits), itertools.repeat(m3merger), chunksize=8
+        )
+
+
+_workerrepo = None
+_workerreaddata = None
+
+
+def _initworker():
+    global _workerreaddata
+    _workerreaddata = filedatareader(_workerrepo)
+
+
+def _benchworker(merge_commit, m3merger):
+    return bench_merge(_workerrepo, merge_commit, m3merger, _workerreaddata)
+
+
+def bench_merge(repo, merge_commit, m3merger, readdata):
+    """Merge the files changed by a merge commit.
+
+    Return (BenchStats, output), where output is a list of texts to write.
+    """
+    bench_stats = BenchStats()
+    output = []
+    parents = repo.dageval(lambda: parentnames(merge_commit))
+
+    if len(parents) != 2:
+        # skip octopus merge
+        #    a
+        #  / | \
+        # b  c  d
+        #  \ | /
+        #    e
+        bench_stats.octopus_merges += 1
+        return bench_stats, output
+
+    p1, p2 = parents
+    gcas = repo.dageval(lambda: gcaall([p1, p2]))
+    if len(gcas) != 1:
+        # skip criss cross merge
+        #    a
+        #   / \
+        #  b1  c1
+        #  |\ /|
+        #  | X |
+        #  |/ \|
+        #  b2  c2
+        bench_stats.criss_cross_merges += 1
+        return bench_stats, output
+
+    basectx = repo[gcas[0]]
+    p1ctx, p2ctx = repo[p1], repo[p2]
+    mergectx = repo[merge_commit]
+
+    files = mergectx.files()
+    matcher = scmutil.matchfiles(repo, files)
+    basefiles, p1files, p2files = [
+        frozenset(ctx.manifest().matches(matcher).keys())
+        for ctx in [basectx, p1ctx, p2ctx]
+    ]
+    for filepath in files:
+        if filepath in basefiles and filepath in p1files and filepath in p2files:
+            merge_file(
+                p1ctx,
+                p2ctx,
+                basectx,
+                mergectx,
+                filepath,
+                m3merger,
+                bench_stats,
+                readdata,
+                output,
+            )
+
+    return bench_stats, output
+
+
+def filedatareader(repo, maxsize=4096):
+    """Return a function reading file contents, cached by (node, path).
+
+    Adjacent merges often share parents, so the same file revision is read
+    (and decompressed) many times during a benchmark run.
+    """
+
+    @functools.lru_cache(maxsize=maxsize)
+    def read(node, filepath):
+        return repo[node][filepath].data()
+
+    def get(ctx, filepath):
+        return read(ctx.node(), filepath)
+
+    return get
+
+
 def merge_file(
-    repo, dstctx, srcctx, basectx, mergectx, filepath, m3merger, bench_stats
+    dstctx,
+    srcctx,
+    basectx,
+    mergectx,
+    filepath,
+    m3merger,
+    bench_stats,
+    readdata,
+    output,
 ):
-    srctext = srcctx[filepath].data()
-    dsttext = dstctx[filepath].data()
-    basetext = basectx[filepath].data()
-
-    if srctext == dsttext:
+    # compare filenodes first, they answer the trivial cases without
+    # reading any file content
+    dstnode = dstctx.filenode(filepath)
+    srcnode = srcctx.filenode(filepath)
+    if dstnode == srcnode:
         return
 
-    bench_stats.changed_files += 1
+    basenode = basectx.filenode(filepath)
+    mergenode = mergectx.filenode(filepath)
+    if dstnode == basenode or srcnode == basenode:
+        # only one side changed the file, the merge result is that side
+        if dstnode == basenode:
+            resultctx, basesidectx = srcctx, dstctx
+        else:
+            resultctx, basesidectx = dstctx, srcctx
+        # a new filenode can still have the base content, for example after
+        # a revert; like below, only count files whose content differs
+        if resultctx[filepath].size() == basesidectx[filepath].size():
+            if readdata(resultctx, filepath) == readdata(basesidectx, filepath):
+                return
+        bench_stats.changed_files += 1
+        if mergenode == resultctx.filenode(filepath):
+            # the merge commit took that side as well
+            return
+        mergedtext = readdata(resultctx, filepath)
+        conflictscount = 0
+    else:
+        srctext = readdata(srcctx, filepath)
+        dsttext = readdata(dstctx, filepath)
+        basetext = readdata(basectx, filepath)
+
+        if srctext == dsttext:
+            return
+
+        bench_stats.changed_files += 1
 
-    m3 = m3merger(basetext, dsttext, srctext)
-    # merge_lines() has side effect setting conflictscount
-    mergedtext = b"".join(m3.merge_lines())
+        if basetext == dsttext or basetext == srctext:
+            # the filenodes differ, but one side still has the base content
+            mergedtext = srctext if basetext == dsttext else dsttext
+            conflictscount = 0
+        else:
+            m3 = m3merger(basetext, dsttext, srctext)
+            # merge_lines_to() has side effect setting conflictscount
+            out = bytearray()
+            m3.merge_lines_to(out)
+            mergedtext = bytes(out)
+            conflictscount = m3.conflictscount
 
-    if m3.conflictscount:
+    if conflictscount:
         bench_stats.unresolved_files += 1
     else:
-        expectedtext = mergectx[filepath].data()
+        # if the merge commit kept one side, that side's content is
+        # already read (and cached)
+        if mergenode == dstnode:
+            expectedtext = readdata(dstctx, filepath)
+        elif mergenode == srcnode:
+            expectedtext = readdata(srcctx, filepath)
+        else:
+            expectedtext = readdata(mergectx, filepath)
         if mergedtext != expectedtext:
             bench_stats.unmatched_files += 1
-            repo.ui.write(
+            output.append(
                 f"\nUnmatched_file: {filepath} {dstctx} {srcctx} {basectx} {mergectx}\n"
             )
             difftext = unidiff(mergedtext, expectedtext, filepath).decode("utf8")
-            repo.ui.write(f"{difftext}\n")
+            output.append(f"{difftext}\n")
 
 
 def unidiff(atext, btext, filepath="") -> bytes:
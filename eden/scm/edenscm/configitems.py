@@ -331,6 +331,7 @@ coreconfigitem("logtoprocess", "develwarn", default=None)
 coreconfigitem("logtoprocess", "measuredtimes", default=None)
 coreconfigitem("merge", "checkunknown", default="abort")
 coreconfigitem("merge", "checkignored", default="abort")
+coreconfigitem("merge", "diff-algorithm", default=None)
 coreconfigitem("experimental", "merge.checkpathconflicts", default=False)
 coreconfigitem("merge", "followcopies", default=True)
 coreconfigitem("merge", "on-failure", default="continue")
@@ -1031,7 +1031,7 @@ class rebaseruntime(object):
 
 
 def _simplemerge(ui, basectx, ctx, p1ctx, manifestbuilder):
-    from ..simplemerge import Merge3Text, wordmergemode
+    from ..simplemerge import diffalgorithmfromui, Merge3Text, wordmergemode
 
     conflicts = []
     resolved = {}
@@ -1041,10 +1041,18 @@ def _simplemerge(ui, basectx, ctx, p1ctx, manifestbuilder):
         othertext = p1ctx[file].data()
 
         wordmerge = wordmergemode.fromui(ui)
-        m3 = Merge3Text(basetext, localtext, othertext, wordmerge=wordmerge)
+        m3 = Merge3Text(
+            basetext,
+            localtext,
+            othertext,
+            wordmerge=wordmerge,
+            diffalgorithm=diffalgorithmfromui(ui),
+        )
 
-        # merge_lines() has side effect setting conflicts
-        merged = b"".join(m3.merge_lines())
+        # merge_lines_to() has side effect setting conflicts
+        out = bytearray()
+        m3.merge_lines_to(out)
+        merged = bytes(out)
 
         # Suppress message if merged result is the same as local contents.
         if merged != localtext:
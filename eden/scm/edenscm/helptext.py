@@ -1569,6 +1569,13 @@ This section specifies behavior during merges and updates.
    different contents. Similar to ``merge.checkignored``, except for files that
    are not ignored. (default: ``abort``)
 
+``diff-algorithm``
+   Diff algorithm used to match the base against each side in the internal
+   3-way merge. Set to ``histogram`` to anchor on lines that occur rarely,
+   which usually aligns moved or reindented code better and produces
+   smaller conflicts. Set to ``myers`` to use the same diff as :hg:`diff`.
+   Other values are an error. (default: ``myers``)
+
 ``on-failure``
    When set to ``continue`` (the default), the merge process attempts to
    merge all unresolved files using the merge chosen tool, regardless of
@@ -623,8 +623,21 @@ def patch(a: Sized, bin):
 
 
 # similar to difflib.SequenceMatcher.get_matching_blocks
-def get_matching_blocks(a: str, b: str) -> List[Tuple[int, ...]]:
-    return [(d[0], d[2], d[1] - d[0]) for d in blocks(a, b)]
+def get_matching_blocks(
+    a: str, b: str, algorithm: Optional[str] = None
+) -> List[Tuple[int, ...]]:
+    """Return (a1, b1, length) matching blocks.
+
+    ``algorithm`` can be "histogram" to use histogram diff. If it is None,
+    the same diff as ``blocks`` is used.
+    """
+    if algorithm is None:
+        diff = blocks
+    elif algorithm == "histogram":
+        diff = bindings.xdiff.histogram_blocks
+    else:
+        raise error.ProgrammingError("unknown diff algorithm: %s" % algorithm)
+    return [(d[0], d[2], d[1] - d[0]) for d in diff(a, b)]
 
 
 def trivialdiffheader(length: int) -> bytes:
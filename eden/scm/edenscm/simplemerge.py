@@ -23,9 +23,13 @@
 
 from __future__ import absolute_import
 
+import bisect
+import itertools
+import operator
+import re
+
 from . import error, mdiff, pycompat, util
 from .i18n import _
-from .pycompat import range
 
 
 def intersect(ra, rb):
@@ -52,13 +56,209 @@ def intersect(ra, rb):
 
 
 def compare_range(a, astart, aend, b, bstart, bend):
-    """Compare a[astart:aend] == b[bstart:bend], without slicing."""
-    if (aend - astart) != (bend - bstart):
-        return False
-    for ia, ib in zip(range(astart, aend), range(bstart, bend)):
-        if a[ia] != b[ib]:
-            return False
-    return True
+    """Compare a[astart:aend] == b[bstart:bend].
+
+    The length check avoids slicing when the ranges obviously differ. List
+    comparison is done in C and short-circuits on identical elements.
+    """
+    return (aend - astart) == (bend - bstart) and a[astart:aend] == b[bstart:bend]
+
+
+def commonprefixlen(a, b):
+    """Return the length of the common prefix of lists a and b.
+
+    >>> commonprefixlen([b"x", b"y", b"z"], [b"x", b"y", b"w"])
+    2
+    >>> commonprefixlen([b"x"], [b"x", b"y"])
+    1
+    >>> commonprefixlen([], [b"x"])
+    0
+    """
+    # compress(count(), ...) yields the indexes where a and b differ, lazily
+    # and without running Python code per element
+    mismatches = itertools.compress(itertools.count(), map(operator.ne, a, b))
+    return next(mismatches, min(len(a), len(b)))
+
+
+# Use binary search in _syncregions if one side has this many times more
+# matching blocks than the other.
+_BISECTRATIO = 8
+
+
+def _bisectsyncregions(amatches, bmatches):
+    """Intersect matching blocks like the sweep in _syncregions.
+
+    Binary search the longer list for blocks overlapping each block of the
+    shorter list, instead of walking both lists.
+
+    >>> _bisectsyncregions([(2, 0, 5)], [(0, 0, 1), (3, 2, 2), (6, 6, 4)])
+    [(3, 5, 1, 3, 2, 4), (6, 7, 4, 5, 6, 7)]
+    >>> _bisectsyncregions([(0, 0, 1), (3, 2, 2), (6, 6, 4)], [(2, 0, 5)])
+    [(3, 5, 2, 4, 1, 3), (6, 7, 6, 7, 4, 5)]
+    """
+    swap = len(amatches) > len(bmatches)
+    if swap:
+        amatches, bmatches = bmatches, amatches
+    bends = [bbase + blen for bbase, bmatch, blen in bmatches]
+    len_b = len(bmatches)
+
+    sl = []
+    for abase, amatch, alen in amatches:
+        aend = abase + alen
+        ib = bisect.bisect_right(bends, abase)
+        while ib < len_b:
+            bbase, bmatch, blen = bmatches[ib]
+            if bbase >= aend:
+                break
+            intbase = max(abase, bbase)
+            intlen = min(aend, bends[ib]) - intbase
+            if intlen > 0:
+                asub = amatch + (intbase - abase)
+                bsub = bmatch + (intbase - bbase)
+                if swap:
+                    asub, bsub = bsub, asub
+                sl.append(
+                    (
+                        intbase,
+                        intbase + intlen,
+                        asub,
+                        asub + intlen,
+                        bsub,
+                        bsub + intlen,
+                    )
+                )
+            ib += 1
+    return sl
+
+
+def _syncregions(base, a, b, amatches, bmatches, bisectratio=_BISECTRATIO):
+    """Pure Python version of Merge3Text.find_sync_regions.
+
+    Intersect the matching blocks of base against a and b. Binary search
+    when one side has more than ``bisectratio`` times the blocks of the
+    other, and walk both lists otherwise.
+    """
+    len_a = len(amatches)
+    len_b = len(bmatches)
+
+    if len_a * bisectratio < len_b or len_b * bisectratio < len_a:
+        sl = _bisectsyncregions(amatches, bmatches)
+    else:
+        sl = []
+        ia = ib = 0
+        while ia < len_a and ib < len_b:
+            abase, amatch, alen = amatches[ia]
+            bbase, bmatch, blen = bmatches[ib]
+
+            # there is an unconflicted block at i; how long does it
+            # extend?  until whichever one ends earlier.
+            i = intersect((abase, abase + alen), (bbase, bbase + blen))
+            if i:
+                intbase = i[0]
+                intend = i[1]
+                intlen = intend - intbase
+
+                # found a match of base[i[0], i[1]]; this may be less than
+                # the region that matches in either one
+                assert intlen <= alen
+                assert intlen <= blen
+                assert abase <= intbase
+                assert bbase <= intbase
+
+                asub = amatch + (intbase - abase)
+                bsub = bmatch + (intbase - bbase)
+                aend = asub + intlen
+                bend = bsub + intlen
+
+                assert base[intbase:intend] == a[asub:aend], (
+                    base[intbase:intend],
+                    a[asub:aend],
+                )
+
+                assert base[intbase:intend] == b[bsub:bend]
+
+                sl.append((intbase, intend, asub, aend, bsub, bend))
+
+            # advance whichever one ends first in the base text
+            if (abase + alen) < (bbase + blen):
+                ia += 1
+            else:
+                ib += 1
+
+    intbase = len(base)
+    abase = len(a)
+    bbase = len(b)
+    sl.append((intbase, intbase, abase, abase, bbase, bbase))
+
+    return sl
+
+
+def _mergeregions(base, a, b, syncregions):
+    """Pure Python version of Merge3Text.merge_regions.
+
+    Walk the sync regions and classify the regions between them.
+    """
+    # section a[0:ia] has been disposed of, etc
+    iz = ia = ib = 0
+
+    for region in syncregions:
+        zmatch, zend, amatch, aend, bmatch, bend = region
+        # print 'match base [%d:%d]' % (zmatch, zend)
+
+        matchlen = zend - zmatch
+        assert matchlen >= 0
+        assert matchlen == (aend - amatch)
+        assert matchlen == (bend - bmatch)
+
+        len_a = amatch - ia
+        len_b = bmatch - ib
+        len_base = zmatch - iz
+        assert len_a >= 0
+        assert len_b >= 0
+        assert len_base >= 0
+
+        # print 'unmatched a=%d, b=%d' % (len_a, len_b)
+
+        if len_a or len_b:
+            # try to avoid actually slicing the lists
+            equal_a = compare_range(a, ia, amatch, base, iz, zmatch)
+            equal_b = compare_range(b, ib, bmatch, base, iz, zmatch)
+            same = compare_range(a, ia, amatch, b, ib, bmatch)
+
+            if same:
+                yield "same", ia, amatch
+            elif equal_a and not equal_b:
+                yield "b", ib, bmatch
+            elif equal_b and not equal_a:
+                yield "a", ia, amatch
+            elif not equal_a and not equal_b:
+                yield "conflict", iz, zmatch, ia, amatch, ib, bmatch
+            else:
+                raise AssertionError("can't handle a=b=base but unmatched")
+
+            ia = amatch
+            ib = bmatch
+        iz = zmatch
+
+        # if the same part of the base was deleted on both sides
+        # that's OK, we can just skip it.
+
+        if matchlen > 0:
+            assert ia == amatch
+            assert ib == bmatch
+            assert iz == zmatch
+
+            yield "unchanged", zmatch, zend
+            iz = zend
+            ia = aend
+            ib = bend
+
+
+try:
+    from edenscmnative.simplemergecore import mergeregions, syncregions
+except ImportError:
+    mergeregions = _mergeregions
+    syncregions = _syncregions
 
 
 class CantShowWordConflicts(Exception):
@@ -78,45 +278,86 @@ class wordmergemode(object):
             return cls.disabled
 
 
+def diffalgorithmfromui(ui):
+    """Return the merge.diff-algorithm config, to pass to Merge3Text.
+
+    "myers" is the default diff, and is returned as None.
+    """
+    algorithm = ui.config("merge", "diff-algorithm")
+    if algorithm == "myers":
+        return None
+    if algorithm not in (None, "histogram"):
+        raise error.ConfigError(
+            _(
+                "merge.diff-algorithm is invalid; expected 'histogram' or 'myers', "
+                "but got '%s'"
+            )
+            % algorithm
+        )
+    return algorithm
+
+
 def trywordmerge(basetext, atext, btext):
     """Try resolve conflicts using wordmerge.
     Return resolved text, or None if merge failed.
     """
+    split = splitwordswithoutemptylines
+    return _trywordmergesplit(split(basetext), split(atext), split(btext))
+
+
+def _trywordmergesplit(basewords, awords, bwords, diffalgorithm=None):
+    """Like trywordmerge, but take words split by splitwordswithoutemptylines."""
     try:
-        m3 = Merge3Text(basetext, atext, btext, wordmerge=wordmergemode.enforced)
-        return b"".join(m3.merge_lines())
+        m3 = Merge3Text._fromsplit(
+            basewords,
+            awords,
+            bwords,
+            wordmerge=wordmergemode.enforced,
+            diffalgorithm=diffalgorithm,
+        )
+        out = bytearray()
+        m3.merge_lines_to(out)
+        return bytes(out)
     except CantShowWordConflicts:
         return None
 
 
+# Same tokens as mdiff.wordsplitter, with trailing "\n"s folded into each
+# token. Leading "\n"s are matched by the last alternative and form a token
+# of their own.
+_wordsplitterwithoutemptylines = re.compile(
+    rb"(?:\t+| +|[a-zA-Z0-9_\x80-\xff]+|[^ \ta-zA-Z0-9_\x80-\xff])\n*"
+)
+
+
 def splitwordswithoutemptylines(text):
     """Run mdiff.splitwords. Then fold "\n" into the previous word.
 
     This makes "surrounding lines/words" more meaningful and avoids some
     aggressive merges where conflicts are more desirable.
+
+    >>> splitwordswithoutemptylines(b"\\n\\na b\\n\\nc\\r\\n")
+    [b'\\n\\n', b'a', b' ', b'b\\n\\n', b'c', b'\\r\\n']
     """
-    words = mdiff.splitwords(text)
-    buf = []
-    result = []
-    append = result.append
-    bufappend = buf.append
-    for word in words:
-        if word != b"\n" and buf:
-            append(b"".join(buf))
-            buf.clear()
-        bufappend(word)
-    if buf:
-        append(b"".join(buf))
-    return result
+    return _wordsplitterwithoutemptylines.findall(text)
 
 
 class Merge3Text(object):
     """3-way merge of texts.
 
     Given strings BASE, OTHER, THIS, tries to produce a combined text
-    incorporating the changes from both BASE->OTHER and BASE->THIS."""
+    incorporating the changes from both BASE->OTHER and BASE->THIS.
+
+    ``diffalgorithm`` is passed to ``mdiff.get_matching_blocks``."""
 
-    def __init__(self, basetext, atext, btext, wordmerge=wordmergemode.disabled):
+    def __init__(
+        self,
+        basetext,
+        atext,
+        btext,
+        wordmerge=wordmergemode.disabled,
+        diffalgorithm=None,
+    ):
         self.basetext = basetext
         self.atext = atext
         self.btext = btext
@@ -128,6 +369,36 @@ class Merge3Text(object):
         self.a = split(atext)
         self.b = split(btext)
         self.wordmerge = wordmerge
+        self.diffalgorithm = diffalgorithm
+
+    @classmethod
+    def _fromsplit(
+        cls, base, a, b, wordmerge=wordmergemode.disabled, diffalgorithm=None
+    ):
+        """Construct from base, a and b already split by the splitter
+        matching ``wordmerge``.
+
+        basetext, atext and btext are joined from the split lists if used.
+        """
+        m3 = object.__new__(cls)
+        m3.base = base
+        m3.a = a
+        m3.b = b
+        m3.wordmerge = wordmerge
+        m3.diffalgorithm = diffalgorithm
+        return m3
+
+    @util.propertycache
+    def basetext(self):
+        return b"".join(self.base)
+
+    @util.propertycache
+    def atext(self):
+        return b"".join(self.a)
+
+    @util.propertycache
+    def btext(self):
+        return b"".join(self.b)
 
     def merge_lines(
         self,
@@ -142,6 +413,51 @@ class Merge3Text(object):
         minimize=False,
     ):
         """Return merge in cvs-like form."""
+        for chunk in self._merge_chunks(
+            name_a,
+            name_b,
+            name_base,
+            start_marker,
+            mid_marker,
+            end_marker,
+            base_marker,
+            localorother,
+            minimize,
+        ):
+            if isinstance(chunk, bytes):
+                yield from chunk.splitlines(True)
+            else:
+                yield from chunk
+
+    def merge_lines_to(self, out, *args, **kwargs):
+        """Append the merge in cvs-like form to the bytearray ``out``.
+
+        Takes the same arguments as merge_lines, but appends each region
+        at once instead of yielding it line by line.
+        """
+        for chunk in self._merge_chunks(*args, **kwargs):
+            if isinstance(chunk, bytes):
+                out += chunk
+            else:
+                out += b"".join(chunk)
+
+    def _merge_chunks(
+        self,
+        name_a=None,
+        name_b=None,
+        name_base=None,
+        start_marker=b"<<<<<<<",
+        mid_marker=b"=======",
+        end_marker=b">>>>>>>",
+        base_marker=None,
+        localorother=None,
+        minimize=False,
+    ):
+        """Yield the merge result in chunks, mostly one per region.
+
+        A chunk is either a sequence of lines, or a bytes object holding a
+        conflict resolved by word merge, which may span several lines.
+        """
         self.conflicts = False
         self.conflictscount = 0
         newline = b"\n"
@@ -156,57 +472,57 @@ class Merge3Text(object):
             end_marker = end_marker + b" " + name_b
         if name_base and base_marker:
             base_marker = base_marker + b" " + name_base
+        # marker lines are the same for every conflict
+        start_line = None if start_marker is None else (start_marker + newline,)
+        base_line = None if base_marker is None else (base_marker + newline,)
+        mid_line = None if mid_marker is None else (mid_marker + newline,)
+        end_line = None if end_marker is None else (end_marker + newline,)
+        base, a, b = self.base, self.a, self.b
         merge_regions = self.merge_regions()
         if minimize:
             merge_regions = self.minimize(merge_regions)
         for t in merge_regions:
             what = t[0]
             if what == "unchanged":
-                for i in range(t[1], t[2]):
-                    yield self.base[i]
+                yield base[t[1] : t[2]]
             elif what == "a" or what == "same":
-                for i in range(t[1], t[2]):
-                    yield self.a[i]
+                yield a[t[1] : t[2]]
             elif what == "b":
-                for i in range(t[1], t[2]):
-                    yield self.b[i]
+                yield b[t[1] : t[2]]
             elif what == "conflict":
                 if localorother == "local":
-                    for i in range(t[3], t[4]):
-                        yield self.a[i]
+                    yield a[t[3] : t[4]]
                 elif localorother == "other":
-                    for i in range(t[5], t[6]):
-                        yield self.b[i]
+                    yield b[t[5] : t[6]]
                 else:
                     if self.wordmerge is wordmergemode.enforced:
                         self.conflicts = True
                         raise CantShowWordConflicts()
                     elif self.wordmerge is wordmergemode.ondemand:
                         # Try resolve the conflicted region using word merge
-                        subbasetext = b"".join(self.base[t[1] : t[2]])
-                        subatext = b"".join(self.a[t[3] : t[4]])
-                        subbtext = b"".join(self.b[t[5] : t[6]])
-                        text = trywordmerge(subbasetext, subatext, subbtext)
+                        split = splitwordswithoutemptylines
+                        text = _trywordmergesplit(
+                            split(b"".join(base[t[1] : t[2]])),
+                            split(b"".join(a[t[3] : t[4]])),
+                            split(b"".join(b[t[5] : t[6]])),
+                            self.diffalgorithm,
+                        )
                         if text:
-                            for line in text.splitlines(True):
-                                yield line
+                            yield text
                             continue
                     self.conflicts = True
                     self.conflictscount += 1
-                    if start_marker is not None:
-                        yield start_marker + newline
-                    for i in range(t[3], t[4]):
-                        yield self.a[i]
-                    if base_marker is not None:
-                        yield base_marker + newline
-                        for i in range(t[1], t[2]):
-                            yield self.base[i]
-                    if mid_marker is not None:
-                        yield mid_marker + newline
-                    for i in range(t[5], t[6]):
-                        yield self.b[i]
-                    if end_marker is not None:
-                        yield end_marker + newline
+                    if start_line is not None:
+                        yield start_line
+                    yield a[t[3] : t[4]]
+                    if base_line is not None:
+                        yield base_line
+                        yield base[t[1] : t[2]]
+                    if mid_line is not None:
+                        yield mid_line
+                    yield b[t[5] : t[6]]
+                    if end_line is not None:
+                        yield end_line
             else:
                 raise ValueError(what)
 
@@ -276,60 +592,7 @@ class Merge3Text(object):
         conflicted, or changed on only one side.
         """
 
-        # section a[0:ia] has been disposed of, etc
-        iz = ia = ib = 0
-
-        for region in self.find_sync_regions():
-            zmatch, zend, amatch, aend, bmatch, bend = region
-            # print 'match base [%d:%d]' % (zmatch, zend)
-
-            matchlen = zend - zmatch
-            assert matchlen >= 0
-            assert matchlen == (aend - amatch)
-            assert matchlen == (bend - bmatch)
-
-            len_a = amatch - ia
-            len_b = bmatch - ib
-            len_base = zmatch - iz
-            assert len_a >= 0
-            assert len_b >= 0
-            assert len_base >= 0
-
-            # print 'unmatched a=%d, b=%d' % (len_a, len_b)
-
-            if len_a or len_b:
-                # try to avoid actually slicing the lists
-                equal_a = compare_range(self.a, ia, amatch, self.base, iz, zmatch)
-                equal_b = compare_range(self.b, ib, bmatch, self.base, iz, zmatch)
-                same = compare_range(self.a, ia, amatch, self.b, ib, bmatch)
-
-                if same:
-                    yield "same", ia, amatch
-                elif equal_a and not equal_b:
-                    yield "b", ib, bmatch
-                elif equal_b and not equal_a:
-                    yield "a", ia, amatch
-                elif not equal_a and not equal_b:
-                    yield "conflict", iz, zmatch, ia, amatch, ib, bmatch
-                else:
-                    raise AssertionError("can't handle a=b=base but unmatched")
-
-                ia = amatch
-                ib = bmatch
-            iz = zmatch
-
-            # if the same part of the base was deleted on both sides
-            # that's OK, we can just skip it.
-
-            if matchlen > 0:
-                assert ia == amatch
-                assert ib == bmatch
-                assert iz == zmatch
-
-                yield "unchanged", zmatch, zend
-                iz = zend
-                ia = aend
-                ib = bend
+        return mergeregions(self.base, self.a, self.b, self.find_sync_regions())
 
     def minimize(self, merge_regions):
         """Trim conflict regions of lines where A and B sides match.
@@ -343,22 +606,14 @@ class Merge3Text(object):
                 yield region
                 continue
             issue, z1, z2, a1, a2, b1, b2 = region
-            alen = a2 - a1
-            blen = b2 - b1
+            alines = self.a[a1:a2]
+            blines = self.b[b1:b2]
 
             # find matches at the front
-            ii = 0
-            while ii < alen and ii < blen and self.a[a1 + ii] == self.b[b1 + ii]:
-                ii += 1
-            startmatches = ii
+            startmatches = commonprefixlen(alines, blines)
 
             # find matches at the end
-            ii = 0
-            while (
-                ii < alen and ii < blen and self.a[a2 - ii - 1] == self.b[b2 - ii - 1]
-            ):
-                ii += 1
-            endmatches = ii
+            endmatches = commonprefixlen(alines[::-1], blines[::-1])
 
             if startmatches > 0:
                 yield "same", a1, a1 + startmatches
@@ -376,14 +631,12 @@ class Merge3Text(object):
             if endmatches > 0:
                 yield "same", a2 - endmatches, a2
 
-    def find_sync_regions(self):
-        """Return a list of sync regions, where both descendants match the base.
+    @util.propertycache
+    def _difftexts(self):
+        """(basetext, atext, btext) as passed to the line-based diff.
 
-        Generates a list of (base1, base2, a1, a2, b1, b2).  There is
-        always a zero-length sync region at the end of all the files.
+        With enforced word merge each word is escaped onto its own line.
         """
-
-        ia = ib = 0
         if self.wordmerge is wordmergemode.enforced:
 
             def escape(word):
@@ -394,89 +647,53 @@ class Merge3Text(object):
                 # escape and concat words
                 return b"".join(map(escape, words))
 
-            basetext = concat(self.base)
-            atext = concat(self.a)
-            btext = concat(self.b)
+            return concat(self.base), concat(self.a), concat(self.b)
         else:
-            basetext = self.basetext
-            atext = self.atext
-            btext = self.btext
+            return self.basetext, self.atext, self.btext
 
-        amatches = mdiff.get_matching_blocks(basetext, atext)
-        bmatches = mdiff.get_matching_blocks(basetext, btext)
-        len_a = len(amatches)
-        len_b = len(bmatches)
+    @util.propertycache
+    def _amatches(self):
+        basetext, atext, btext = self._difftexts
+        return mdiff.get_matching_blocks(basetext, atext, self.diffalgorithm)
 
-        sl = []
+    @util.propertycache
+    def _bmatches(self):
+        basetext, atext, btext = self._difftexts
+        return mdiff.get_matching_blocks(basetext, btext, self.diffalgorithm)
 
-        while ia < len_a and ib < len_b:
-            abase, amatch, alen = amatches[ia]
-            bbase, bmatch, blen = bmatches[ib]
-
-            # there is an unconflicted block at i; how long does it
-            # extend?  until whichever one ends earlier.
-            i = intersect((abase, abase + alen), (bbase, bbase + blen))
-            if i:
-                intbase = i[0]
-                intend = i[1]
-                intlen = intend - intbase
-
-                # found a match of base[i[0], i[1]]; this may be less than
-                # the region that matches in either one
-                assert intlen <= alen
-                assert intlen <= blen
-                assert abase <= intbase
-                assert bbase <= intbase
-
-                asub = amatch + (intbase - abase)
-                bsub = bmatch + (intbase - bbase)
-                aend = asub + intlen
-                bend = bsub + intlen
-
-                assert self.base[intbase:intend] == self.a[asub:aend], (
-                    self.base[intbase:intend],
-                    self.a[asub:aend],
-                )
-
-                assert self.base[intbase:intend] == self.b[bsub:bend]
-
-                sl.append((intbase, intend, asub, aend, bsub, bend))
-
-            # advance whichever one ends first in the base text
-            if (abase + alen) < (bbase + blen):
-                ia += 1
-            else:
-                ib += 1
-
-        intbase = len(self.base)
-        abase = len(self.a)
-        bbase = len(self.b)
-        sl.append((intbase, intbase, abase, abase, bbase, bbase))
+    def find_sync_regions(self):
+        """Return a list of sync regions, where both descendants match the base.
 
-        return sl
+        Generates a list of (base1, base2, a1, a2, b1, b2).  There is
+        always a zero-length sync region at the end of all the files.
+        """
+        return syncregions(self.base, self.a, self.b, self._amatches, self._bmatches)
 
     def find_unconflicted(self):
         """Return a list of ranges in base that are not conflicted."""
-        am = mdiff.get_matching_blocks(self.basetext, self.atext)
-        bm = mdiff.get_matching_blocks(self.basetext, self.btext)
+        am = self._amatches
+        bm = self._bmatches
+        len_a = len(am)
+        len_b = len(bm)
 
         unc = []
 
-        while am and bm:
+        ia = ib = 0
+        while ia < len_a and ib < len_b:
             # there is an unconflicted block at i; how long does it
             # extend?  until whichever one ends earlier.
-            a1 = am[0][0]
-            a2 = a1 + am[0][2]
-            b1 = bm[0][0]
-            b2 = b1 + bm[0][2]
+            a1 = am[ia][0]
+            a2 = a1 + am[ia][2]
+            b1 = bm[ib][0]
+            b2 = b1 + bm[ib][2]
             i = intersect((a1, a2), (b1, b2))
             if i:
                 unc.append(i)
 
             if a2 < b2:
-                del am[0]
+                ia += 1
             else:
-                del bm[0]
+                ib += 1
 
         return unc
 
@@ -522,7 +739,7 @@ def _mergediff(m3, name_a, name_b, name_base):
                     basetext,
                     b"".join(a_lines),
                     lines1=base_lines,
-                    lines2=b_lines,
+                    lines2=a_lines,
                 )
             )
 
@@ -592,7 +809,13 @@ def simplemerge(ui, localctx, basectx, otherctx, **opts):
     except error.Abort:
         return 1
 
-    m3 = Merge3Text(basetext, localtext, othertext, wordmerge=wordmergemode.fromui(ui))
+    m3 = Merge3Text(
+        basetext,
+        localtext,
+        othertext,
+        wordmerge=wordmergemode.fromui(ui),
+        diffalgorithm=diffalgorithmfromui(ui),
+    )
 
     extrakwargs = {"localorother": opts.get("localorother", None), "minimize": True}
     if mode == "union":
@@ -606,10 +829,12 @@ def simplemerge(ui, localctx, basectx, otherctx, **opts):
 
     if mode == "mergediff":
         lines, conflicts = _mergediff(m3, name_a, name_b, name_base)
+        mergedtext = b"".join(lines)
     else:
-        lines = list(m3.merge_lines(name_a=name_a, name_b=name_b, **extrakwargs))
+        out = bytearray()
+        m3.merge_lines_to(out, name_a=name_a, name_b=name_b, **extrakwargs)
+        mergedtext = bytes(out)
         conflicts = m3.conflicts
-    mergedtext = b"".join(lines)
     if opts.get("print"):
         ui.fout.write(mergedtext)
     else:
@@ -14,6 +14,11 @@ pub fn init_module(py: Python, package: &str) -> PyResult<PyModule> {
     let name = [package, "xdiff"].join(".");
     let m = PyModule::new(py, &name)?;
     m.add(py, "blocks", py_fn!(py, blocks(a: PyObject, b: PyObject)))?;
+    m.add(
+        py,
+        "histogram_blocks",
+        py_fn!(py, histogram_blocks(a: PyObject, b: PyObject)),
+    )?;
     m.add(
         py,
         "edit_cost",
@@ -33,6 +38,21 @@ fn blocks(py: Python, a: PyObject, b: PyObject) -> PyResult<Serde<Vec<(u64, u64,
     Ok(Serde(result))
 }
 
+// (a: bytes | str, b: bytes | str) -> List[(a1, a2, b1, b2)].
+// Yield matching blocks, using histogram diff.
+fn histogram_blocks(
+    py: Python,
+    a: PyObject,
+    b: PyObject,
+) -> PyResult<Serde<Vec<(u64, u64, u64, u64)>>> {
+    let a = a.extract::<BytesOrStr>(py)?;
+    let b = b.extract::<BytesOrStr>(py)?;
+    let a_data = a.as_bytes(py)?;
+    let b_data = b.as_bytes(py)?;
+    let result = py.allow_threads(|| xdiff::histogram_blocks(&a_data, &b_data));
+    Ok(Serde(result))
+}
+
 // (a: bytes | str, b: bytes | str, max_edit_cost) -> edit_cost
 fn edit_cost(py: Python, a: PyObject, b: PyObject, max_edit_cost: u64) -> PyResult<u64> {
     let a = a.extract::<BytesOrStr>(py)?;
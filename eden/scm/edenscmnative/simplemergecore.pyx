@@ -0,0 +1,121 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This software may be used and distributed according to the terms of the
+# GNU General Public License version 2.
+
+# cython: language_level=3str
+
+"""compiled region walks for simplemerge
+
+Drop-in replacements for the pure Python ``_syncregions`` and
+``_mergeregions`` in ``edenscm.simplemerge``. Indexes are C integers and
+the small helpers (``intersect``, ``compare_range``) are inlined.
+"""
+
+
+cdef inline bint compare_range(
+    list a, Py_ssize_t astart, Py_ssize_t aend,
+    list b, Py_ssize_t bstart, Py_ssize_t bend,
+):
+    cdef Py_ssize_t i
+    if (aend - astart) != (bend - bstart):
+        return False
+    for i in range(aend - astart):
+        if a[astart + i] is b[bstart + i]:
+            continue
+        if a[astart + i] != b[bstart + i]:
+            return False
+    return True
+
+
+def syncregions(list base, list a, list b, list amatches, list bmatches):
+    """Return a list of sync regions, where both descendants match the base.
+
+    See ``Merge3Text.find_sync_regions``.
+    """
+    cdef Py_ssize_t ia = 0, ib = 0
+    cdef Py_ssize_t len_a = len(amatches), len_b = len(bmatches)
+    cdef Py_ssize_t abase, amatch, alen, bbase, bmatch, blen
+    cdef Py_ssize_t intbase, intend, intlen, asub, bsub
+    cdef list sl = []
+
+    while ia < len_a and ib < len_b:
+        abase, amatch, alen = amatches[ia]
+        bbase, bmatch, blen = bmatches[ib]
+
+        # intersect (abase, abase + alen) and (bbase, bbase + blen)
+        intbase = abase if abase > bbase else bbase
+        intend = abase + alen
+        if bbase + blen < intend:
+            intend = bbase + blen
+        if intbase < intend:
+            intlen = intend - intbase
+            asub = amatch + (intbase - abase)
+            bsub = bmatch + (intbase - bbase)
+            sl.append(
+                (intbase, intend, asub, asub + intlen, bsub, bsub + intlen)
+            )
+
+        # advance whichever one ends first in the base text
+        if (abase + alen) < (bbase + blen):
+            ia += 1
+        else:
+            ib += 1
+
+    intbase = len(base)
+    abase = len(a)
+    bbase = len(b)
+    sl.append((intbase, intbase, abase, abase, bbase, bbase))
+
+    return sl
+
+
+def mergeregions(list base, list a, list b, syncregions):
+    """Return sequences of matching and conflicting regions.
+
+    See ``Merge3Text.merge_regions``.
+    """
+    # section a[0:ia] has been disposed of, etc
+    cdef Py_ssize_t iz = 0, ia = 0, ib = 0
+    cdef Py_ssize_t zmatch, zend, amatch, aend, bmatch, bend, matchlen
+    cdef bint equal_a, equal_b, same
+
+    for region in syncregions:
+        zmatch, zend, amatch, aend, bmatch, bend = region
+
+        matchlen = zend - zmatch
+        assert matchlen >= 0
+        assert matchlen == (aend - amatch)
+        assert matchlen == (bend - bmatch)
+        assert amatch >= ia
+        assert bmatch >= ib
+        assert zmatch >= iz
+
+        if amatch != ia or bmatch != ib:
+            equal_a = compare_range(a, ia, amatch, base, iz, zmatch)
+            equal_b = compare_range(b, ib, bmatch, base, iz, zmatch)
+            same = compare_range(a, ia, amatch, b, ib, bmatch)
+
+            if same:
+                yield "same", ia, amatch
+            elif equal_a and not equal_b:
+                yield "b", ib, bmatch
+            elif equal_b and not equal_a:
+                yield "a", ia, amatch
+            elif not equal_a and not equal_b:
+                yield "conflict", iz, zmatch, ia, amatch, ib, bmatch
+            else:
+                raise AssertionError("can't handle a=b=base but unmatched")
+
+            ia = amatch
+            ib = bmatch
+        iz = zmatch
+
+        # if the same part of the base was deleted on both sides
+        # that's OK, we can just skip it.
+
+        if matchlen > 0:
+            yield "unchanged", zmatch, zend
+            iz = zend
+            ia = aend
+            ib = bend
@@ -0,0 +1,40 @@
+/*
+ * Copyright (c) Meta Platforms, Inc. and affiliates.
+ *
+ * This software may be used and distributed according to the terms of the
+ * GNU General Public License version 2.
+ */
+
+use minibench::bench;
+use minibench::elapsed;
+
+/// Two texts of `n` lines, with one line changed every 97 lines.
+fn gen_texts(n: usize) -> (Vec<u8>, Vec<u8>) {
+    let a: String = (0..n).map(|i| format!("line {i}\n")).collect();
+    let b: String = (0..n)
+        .map(|i| {
+            if i % 97 == 0 {
+                format!("changed {i}\n")
+            } else {
+                format!("line {i}\n")
+            }
+        })
+        .collect();
+    (a.into_bytes(), b.into_bytes())
+}
+
+fn main() {
+    for n in [20_000, 80_000, 320_000] {
+        let (a, b) = gen_texts(n);
+        bench(format!("blocks {n} lines"), || {
+            elapsed(|| {
+                xdiff::blocks(&a, &b);
+            })
+        });
+        bench(format!("histogram_blocks {n} lines"), || {
+            elapsed(|| {
+                xdiff::histogram_blocks(&a, &b);
+            })
+        });
+    }
+}
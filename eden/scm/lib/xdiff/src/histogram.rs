@@ -0,0 +1,366 @@
+/*
+ * Copyright (c) Meta Platforms, Inc. and affiliates.
+ *
+ * This software may be used and distributed according to the terms of the
+ * GNU General Public License version 2.
+ */
+
+//! Histogram diff.
+//!
+//! A variant of patience diff, as used by git and JGit. For each region, the
+//! longest common run anchored at the line that occurs the fewest times is
+//! taken as a match, then the regions before and after it are diffed
+//! recursively. Regions where every common line occurs more than
+//! [`MAX_CHAIN_LENGTH`] times are handed to a fallback diff.
+
+use std::collections::HashMap;
+use std::hash::Hash;
+use std::ops::Range;
+
+/// Lines occurring more often than this in a region are not used as anchors.
+pub const MAX_CHAIN_LENGTH: usize = 64;
+
+/// A matching run: `a[a_start..a_start + len] == b[b_start..b_start + len]`.
+#[derive(Clone, Copy, PartialEq, Eq, Debug)]
+pub struct Match {
+    pub a_start: usize,
+    pub b_start: usize,
+    pub len: usize,
+}
+
+/// Find matching runs between `a` and `b` using histogram diff.
+///
+/// `fallback(a_range, b_range)` is called for regions without a usable
+/// anchor and must return the matches within those ranges, with absolute
+/// indexes, in increasing order.
+///
+/// Returns non-empty, non-adjacent matches, in increasing order.
+pub fn histogram_matches<T, F>(a: &[T], b: &[T], mut fallback: F) -> Vec<Match>
+where
+    T: Eq + Hash,
+    F: FnMut(Range<usize>, Range<usize>) -> Vec<Match>,
+{
+    // Lines are hashed and compared once here. The rest works on ids.
+    let (a, b, id_count) = intern(a, b);
+    let mut index = Index::new(a.len(), id_count);
+    let mut matches = Vec::new();
+    // Use a work list instead of recursion to avoid deep stacks on large
+    // inputs. Matches are sorted at the end.
+    let mut regions = vec![(0..a.len(), 0..b.len())];
+
+    while let Some((mut ar, mut br)) = regions.pop() {
+        // Common prefix and suffix.
+        let prefix = common_len(a[ar.clone()].iter(), b[br.clone()].iter());
+        push_match(&mut matches, ar.start, br.start, prefix);
+        ar.start += prefix;
+        br.start += prefix;
+        let suffix = common_len(a[ar.clone()].iter().rev(), b[br.clone()].iter().rev());
+        push_match(&mut matches, ar.end - suffix, br.end - suffix, suffix);
+        ar.end -= suffix;
+        br.end -= suffix;
+
+        if ar.is_empty() || br.is_empty() {
+            continue;
+        }
+
+        match index.find_anchor(&a, &b, ar.clone(), br.clone()) {
+            Anchor::Found(m) => {
+                matches.push(m);
+                regions.push((ar.start..m.a_start, br.start..m.b_start));
+                regions.push((m.a_start + m.len..ar.end, m.b_start + m.len..br.end));
+            }
+            Anchor::TooCommon => matches.extend(fallback(ar, br).into_iter().filter(|m| m.len > 0)),
+            Anchor::NoCommonLines => {}
+        }
+    }
+
+    matches.sort_unstable_by_key(|m| m.a_start);
+
+    // Merge adjacent matches, for example a common prefix and the anchor
+    // following it.
+    let mut merged: Vec<Match> = Vec::with_capacity(matches.len());
+    for m in matches {
+        match merged.last_mut() {
+            Some(last)
+                if last.a_start + last.len == m.a_start && last.b_start + last.len == m.b_start =>
+            {
+                last.len += m.len
+            }
+            _ => merged.push(m),
+        }
+    }
+    merged
+}
+
+/// Map lines to dense ids. Equal lines get equal ids.
+fn intern<T: Eq + Hash>(a: &[T], b: &[T]) -> (Vec<u32>, Vec<u32>, usize) {
+    let mut ids: HashMap<&T, u32> = HashMap::with_capacity(a.len());
+    let mut intern_line = |line| {
+        let next_id = ids.len() as u32;
+        *ids.entry(line).or_insert(next_id)
+    };
+    let a_ids: Vec<u32> = a.iter().map(&mut intern_line).collect();
+    let b_ids: Vec<u32> = b.iter().map(&mut intern_line).collect();
+    (a_ids, b_ids, ids.len())
+}
+
+enum Anchor {
+    Found(Match),
+    TooCommon,
+    NoCommonLines,
+}
+
+const NONE: u32 = u32::MAX;
+
+/// Occurrences of ids in a region of `a`, like the hash table in git's
+/// xhistogram. The vectors are allocated once and reset after each region.
+struct Index {
+    /// First position of an id in the region.
+    head: Vec<u32>,
+    /// Next position of the same id in the region, by position in `a`.
+    next: Vec<u32>,
+    /// Occurrences of an id in the region.
+    count: Vec<u32>,
+}
+
+impl Index {
+    fn new(a_len: usize, id_count: usize) -> Self {
+        Self {
+            head: vec![NONE; id_count],
+            next: vec![NONE; a_len],
+            count: vec![0; id_count],
+        }
+    }
+
+    fn find_anchor(&mut self, a: &[u32], b: &[u32], ar: Range<usize>, br: Range<usize>) -> Anchor {
+        for i in ar.clone().rev() {
+            let id = a[i] as usize;
+            self.next[i] = self.head[id];
+            self.head[id] = i as u32;
+            self.count[id] += 1;
+        }
+
+        let anchor = self.scan(a, b, ar.clone(), br);
+
+        for i in ar {
+            let id = a[i] as usize;
+            self.head[id] = NONE;
+            self.count[id] = 0;
+        }
+        anchor
+    }
+
+    fn scan(&self, a: &[u32], b: &[u32], ar: Range<usize>, br: Range<usize>) -> Anchor {
+        let count = |id: u32| self.count[id as usize] as usize;
+        // Twice the middle of the b region, to compare distances without
+        // rounding.
+        let b_mid2 = br.start + br.end;
+        let distance = |m: &Match| (2 * m.b_start + m.len).abs_diff(b_mid2);
+
+        let mut best: Option<Match> = None;
+        let mut best_count = MAX_CHAIN_LENGTH;
+        let mut has_common = false;
+
+        let mut bi = br.start;
+        while bi < br.end {
+            let mut next_bi = bi + 1;
+            let occurrences = count(b[bi]);
+            if occurrences > 0 {
+                has_common = true;
+            }
+            if occurrences > 0 && occurrences <= best_count {
+                let mut ai = self.head[b[bi] as usize];
+                while ai != NONE {
+                    let ai_usize = ai as usize;
+                    let mut run_count = occurrences;
+                    let (mut a_start, mut b_start) = (ai_usize, bi);
+                    while a_start > ar.start
+                        && b_start > br.start
+                        && a[a_start - 1] == b[b_start - 1]
+                    {
+                        a_start -= 1;
+                        b_start -= 1;
+                        run_count = run_count.min(count(a[a_start]));
+                    }
+                    let (mut a_end, mut b_end) = (ai_usize + 1, bi + 1);
+                    while a_end < ar.end && b_end < br.end && a[a_end] == b[b_end] {
+                        run_count = run_count.min(count(a[a_end]));
+                        a_end += 1;
+                        b_end += 1;
+                    }
+                    next_bi = next_bi.max(b_end);
+
+                    let m = Match {
+                        a_start,
+                        b_start,
+                        len: a_end - a_start,
+                    };
+                    // Prefer rare lines, then long runs. Among equal runs,
+                    // prefer the one nearest to the middle so regions are
+                    // split evenly. Taking the first one makes evenly spread
+                    // edits quadratic.
+                    let better = match best {
+                        None => true,
+                        Some(best) => {
+                            run_count < best_count
+                                || m.len > best.len
+                                || (run_count == best_count
+                                    && m.len == best.len
+                                    && distance(&m) < distance(&best))
+                        }
+                    };
+                    if better {
+                        best = Some(m);
+                        best_count = run_count;
+                    }
+                    ai = self.next[ai_usize];
+                }
+            }
+            bi = next_bi;
+        }
+
+        match best {
+            Some(m) => Anchor::Found(m),
+            None if has_common => Anchor::TooCommon,
+            None => Anchor::NoCommonLines,
+        }
+    }
+}
+
+fn common_len<'a, T: Eq + 'a>(
+    a: impl Iterator<Item = &'a T>,
+    b: impl Iterator<Item = &'a T>,
+) -> usize {
+    a.zip(b).take_while(|(x, y)| x == y).count()
+}
+
+fn push_match(matches: &mut Vec<Match>, a_start: usize, b_start: usize, len: usize) {
+    if len > 0 {
+        matches.push(Match {
+            a_start,
+            b_start,
+            len,
+        });
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Quadratic LCS, used as the fallback in tests.
+    fn lcs_fallback<T: Eq>(a: &[T], b: &[T], ar: Range<usize>, br: Range<usize>) -> Vec<Match> {
+        let (n, m) = (ar.len(), br.len());
+        let mut table = vec![vec![0usize; m + 1]; n + 1];
+        for i in (0..n).rev() {
+            for j in (0..m).rev() {
+                table[i][j] = if a[ar.start + i] == b[br.start + j] {
+                    table[i + 1][j + 1] + 1
+                } else {
+                    table[i + 1][j].max(table[i][j + 1])
+                };
+            }
+        }
+        let mut result = Vec::new();
+        let (mut i, mut j) = (0, 0);
+        while i < n && j < m {
+            if a[ar.start + i] == b[br.start + j] {
+                push_match(&mut result, ar.start + i, br.start + j, 1);
+                i += 1;
+                j += 1;
+            } else if table[i + 1][j] >= table[i][j + 1] {
+                i += 1;
+            } else {
+                j += 1;
+            }
+        }
+        result
+    }
+
+    fn diff(a: &str, b: &str) -> Vec<Match> {
+        let a: Vec<char> = a.chars().collect();
+        let b: Vec<char> = b.chars().collect();
+        histogram_matches(&a, &b, |ar, br| lcs_fallback(&a, &b, ar, br))
+    }
+
+    fn m(a_start: usize, b_start: usize, len: usize) -> Match {
+        Match {
+            a_start,
+            b_start,
+            len,
+        }
+    }
+
+    #[test]
+    fn test_trivial() {
+        assert_eq!(diff("", ""), []);
+        assert_eq!(diff("abc", ""), []);
+        assert_eq!(diff("abc", "abc"), [m(0, 0, 3)]);
+        assert_eq!(diff("abc", "xyz"), []);
+    }
+
+    #[test]
+    fn test_insert_delete() {
+        assert_eq!(diff("abc", "aXbc"), [m(0, 0, 1), m(1, 2, 2)]);
+        assert_eq!(diff("aXbc", "abc"), [m(0, 0, 1), m(2, 1, 2)]);
+        assert_eq!(diff("abcd", "bcde"), [m(1, 0, 3)]);
+    }
+
+    #[test]
+    fn test_longest_anchored_run() {
+        // All lines are unique. "ab" is the longest run through an anchor
+        // and wins over "c".
+        assert_eq!(diff("ab}c}", "c}ab}"), [m(0, 2, 2), m(4, 4, 1)]);
+    }
+
+    #[test]
+    fn test_fallback_on_repetitive_input() {
+        // "a" occurs too often to be an anchor, and "c" and "d" are not
+        // common, so the whole region goes to the fallback.
+        let a = "a".repeat(MAX_CHAIN_LENGTH + 1) + "c";
+        let b = "d".to_owned() + &"a".repeat(MAX_CHAIN_LENGTH + 1);
+        assert_eq!(diff(&a, &b), [m(0, 1, MAX_CHAIN_LENGTH + 1)]);
+    }
+
+    #[test]
+    fn test_evenly_spread_edits() {
+        // All runs are unique and equally long. Splitting off one run per
+        // anchor search made this quadratic.
+        let n = 200_000;
+        let a: Vec<usize> = (0..n).collect();
+        let b: Vec<usize> = (0..n)
+            .map(|i| if i % 97 == 0 { n + i } else { i })
+            .collect();
+        let matches = histogram_matches(&a, &b, |_, _| unreachable!());
+        let expected: Vec<Match> = (0..n)
+            .step_by(97)
+            .map(|i| m(i + 1, i + 1, (n - i - 1).min(96)))
+            .collect();
+        assert_eq!(matches, expected);
+    }
+
+    #[test]
+    fn test_matches_are_valid() {
+        let inputs = [
+            ("abcabba", "cbabac"),
+            ("a}b}c}d}", "a}c}b}d}e}"),
+            ("xaxbxcx", "xcxbxax"),
+            ("abcdefg", "gfedcba"),
+        ];
+        for (a, b) in inputs {
+            let matches = diff(a, b);
+            let (ac, bc): (Vec<char>, Vec<char>) = (a.chars().collect(), b.chars().collect());
+            let (mut a_end, mut b_end) = (0, 0);
+            for x in &matches {
+                assert!(x.len > 0);
+                assert!(x.a_start >= a_end && x.b_start >= b_end);
+                assert_eq!(
+                    ac[x.a_start..x.a_start + x.len],
+                    bc[x.b_start..x.b_start + x.len]
+                );
+                a_end = x.a_start + x.len;
+                b_end = x.b_start + x.len;
+            }
+        }
+    }
+}
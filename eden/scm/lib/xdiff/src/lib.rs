@@ -16,6 +16,8 @@ use std::os::raw::c_void;
 
 use xdiff_sys as ffi;
 
+pub mod histogram;
+
 /// An individual difference between two texts. Consists of two
 /// line ranges that specify which parts of the texts differ.
 ///
@@ -152,6 +154,66 @@ pub fn blocks(a: &[u8], b: &[u8]) -> Vec<(u64, u64, u64, u64)> {
     result
 }
 
+/// Produce matching blocks like [`blocks`], using histogram diff.
+///
+/// Histogram diff anchors on lines that occur rarely, which tends to
+/// align functions and blocks better than Myers diff when code is moved
+/// around. Regions without such lines fall back to [`blocks`].
+pub fn histogram_blocks(a: &[u8], b: &[u8]) -> Vec<(u64, u64, u64, u64)> {
+    let a_offsets = line_offsets(a);
+    let b_offsets = line_offsets(b);
+    let a_lines: Vec<&[u8]> = a_offsets.windows(2).map(|w| &a[w[0]..w[1]]).collect();
+    let b_lines: Vec<&[u8]> = b_offsets.windows(2).map(|w| &b[w[0]..w[1]]).collect();
+
+    let matches = histogram::histogram_matches(&a_lines, &b_lines, |ar, br| {
+        let a_text = &a[a_offsets[ar.start]..a_offsets[ar.end]];
+        let b_text = &b[b_offsets[br.start]..b_offsets[br.end]];
+        blocks(a_text, b_text)
+            .into_iter()
+            .map(|(a1, a2, b1, _b2)| histogram::Match {
+                a_start: ar.start + a1 as usize,
+                b_start: br.start + b1 as usize,
+                len: (a2 - a1) as usize,
+            })
+            .collect()
+    });
+
+    let mut result: Vec<(u64, u64, u64, u64)> = matches
+        .into_iter()
+        .map(|m| {
+            (
+                m.a_start as u64,
+                (m.a_start + m.len) as u64,
+                m.b_start as u64,
+                (m.b_start + m.len) as u64,
+            )
+        })
+        .collect();
+    // Like bdiff, the last block ends at the end of both texts.
+    let (a_len, b_len) = (a_lines.len() as u64, b_lines.len() as u64);
+    match result.last() {
+        Some(&(_, a2, _, b2)) if a2 == a_len && b2 == b_len => {}
+        _ => result.push((a_len, a_len, b_len, b_len)),
+    }
+    result
+}
+
+/// Start offsets of lines in `text`, followed by `text.len()`.
+/// Lines include their trailing "\n".
+fn line_offsets(text: &[u8]) -> Vec<usize> {
+    let mut offsets = vec![0];
+    offsets.extend(
+        text.iter()
+            .enumerate()
+            .filter(|(_, &c)| c == b'\n')
+            .map(|(i, _)| i + 1),
+    );
+    if offsets.last() != Some(&text.len()) {
+        offsets.push(text.len());
+    }
+    offsets
+}
+
 /// Calculate the edit cost (added and deleted line count), with a maximum threshold.
 ///
 /// The maximum threshold `max_edit_cost` decides the maximum D in O(N+D^2)
@@ -1081,6 +1143,20 @@ Binary file x has changed
         );
     }
 
+    #[test]
+    fn test_histogram_blocks() {
+        assert_eq!(
+            histogram_blocks(b"a\nb\nc\nd\nx\ny\nz\n", b"b\nc\nd\ne\nf\nu\nv\nw\nx\n"),
+            [(1, 4, 0, 3), (4, 5, 8, 9), (7, 7, 9, 9)],
+        );
+        assert_eq!(histogram_blocks(b"", b""), [(0, 0, 0, 0)]);
+        assert_eq!(histogram_blocks(b"a\nb", b"a\nb"), [(0, 2, 0, 2)]);
+        assert_eq!(
+            histogram_blocks(b"a\nb\nc\n", b"c\na\nb\n"),
+            [(0, 2, 1, 3), (3, 3, 3, 3)],
+        );
+    }
+
     #[test]
     fn test_edit_cost_small_diffs() {
         let c = |a: &str, b: &str, max_edit_cost: u64| {
@@ -1603,6 +1603,12 @@ extmodules += cythonize(
             include_dirs=include_dirs,
             extra_compile_args=filter(None, [STDC99, PRODUCEDEBUGSYMBOLS]),
         ),
+        Extension(
+            "edenscmnative.simplemergecore",
+            sources=["edenscmnative/simplemergecore.pyx"],
+            include_dirs=include_dirs,
+            extra_compile_args=filter(None, [PRODUCEDEBUGSYMBOLS]),
+        ),
     ],
     compiler_directives=cythonopts,
 )
@@ -68,6 +68,7 @@ testmod("edenscm.result")
 testmod("edenscm.revset")
 testmod("edenscm.revsetlang")
 testmod("edenscm.scmutil")
+testmod("edenscm.simplemerge")
 testmod("edenscm.smartset")
 testmod("edenscm.store")
 testmod("edenscm.templatefilters")
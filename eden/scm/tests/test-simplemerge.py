@@ -18,9 +18,10 @@ from __future__ import absolute_import
 
 import unittest
 
-from edenscm import error, util
+from edenscm import error, simplemerge, ui as uimod, util
 from edenscm.pycompat import decodeutf8
 from edenscm.simplemerge import Merge3Text, wordmergemode
+from edenscmnative import simplemergecore
 
 
 TestCase = unittest.TestCase
@@ -32,13 +33,22 @@ class Merge3(Merge3Text):
     incorporating the changes from both BASE->OTHER and BASE->THIS.
     All three will typically be sequences of lines."""
 
-    def __init__(self, base, a, b, wordmerge=wordmergemode.disabled):
+    def __init__(
+        self, base, a, b, wordmerge=wordmergemode.disabled, diffalgorithm=None
+    ):
         basetext = b"\n".join([i.strip(b"\n") for i in base] + [b""])
         atext = b"\n".join([i.strip(b"\n") for i in a] + [b""])
         btext = b"\n".join([i.strip(b"\n") for i in b] + [b""])
         if util.binary(basetext) or util.binary(atext) or util.binary(btext):
             raise error.Abort("don't know how to merge binary files")
-        Merge3Text.__init__(self, basetext, atext, btext, wordmerge=wordmerge)
+        Merge3Text.__init__(
+            self,
+            basetext,
+            atext,
+            btext,
+            wordmerge=wordmerge,
+            diffalgorithm=diffalgorithm,
+        )
         self.base = base
         self.a = a
         self.b = b
@@ -128,6 +138,22 @@ MERGED_RESULT = split_lines(
 )
 
 
+def sync_inputs():
+    """Yield (base, a, b, amatches, bmatches) to test the region walks.
+
+    Includes lopsided block lists, where one side changes a single line and
+    the other changes every other line.
+    """
+    lines = [b"%d\n" % i for i in range(100)]
+    few = lines[:51] + [b"x\n"] + lines[52:]
+    many = [line if i % 2 else b"y\n" for i, line in enumerate(lines)]
+    for base, a, b in [(TZU, LAO, TAO), (lines, few, many), (lines, many, few)]:
+        m3 = Merge3(base, a, b)
+        amatches = simplemerge.mdiff.get_matching_blocks(m3.basetext, m3.atext)
+        bmatches = simplemerge.mdiff.get_matching_blocks(m3.basetext, m3.btext)
+        yield base, a, b, amatches, bmatches
+
+
 class TestMerge3(TestCase):
     def log(self, msg):
         pass
@@ -329,6 +355,53 @@ bbb
         self.log(decodeutf8(b"".join(ml)))
         self.assertEqual(ml, MERGED_RESULT)
 
+    def test_merge_poem_histogram(self):
+        m3 = Merge3(TZU, LAO, TAO, diffalgorithm="histogram")
+        ml = list(m3.merge_lines(b"LAO", b"TAO"))
+        self.assertEqual(ml, MERGED_RESULT)
+
+    def test_diffalgorithmfromui(self):
+        ui = uimod.ui()
+        self.assertIsNone(simplemerge.diffalgorithmfromui(ui))
+        ui.setconfig("merge", "diff-algorithm", "histogram", "test")
+        self.assertEqual(simplemerge.diffalgorithmfromui(ui), "histogram")
+        ui.setconfig("merge", "diff-algorithm", "myers", "test")
+        self.assertIsNone(simplemerge.diffalgorithmfromui(ui))
+        ui.setconfig("merge", "diff-algorithm", "histgram", "test")
+        with self.assertRaises(error.ConfigError):
+            simplemerge.diffalgorithmfromui(ui)
+
+    def test_region_implementations(self):
+        """Native region walks match the pure Python ones"""
+        for base, a, b, amatches, bmatches in sync_inputs():
+            sync = simplemerge._syncregions(base, a, b, amatches, bmatches)
+            self.assertEqual(
+                simplemergecore.syncregions(base, a, b, amatches, bmatches), sync
+            )
+            self.assertEqual(
+                list(simplemergecore.mergeregions(base, a, b, sync)),
+                list(simplemerge._mergeregions(base, a, b, sync)),
+            )
+
+    def test_bisect_sync_regions(self):
+        """The bisect path of _syncregions matches the two-pointer sweep"""
+        for base, a, b, amatches, bmatches in sync_inputs():
+            # ratio 0 always bisects, a ratio above the block count never does
+            bisected = simplemerge._syncregions(
+                base, a, b, amatches, bmatches, bisectratio=0
+            )
+            swept = simplemerge._syncregions(
+                base, a, b, amatches, bmatches, bisectratio=len(base) + 1
+            )
+            self.assertEqual(bisected, swept)
+
+    def test_merge_lines_to(self):
+        m3 = Merge3(TZU, LAO, TAO)
+        out = bytearray()
+        m3.merge_lines_to(out, b"LAO", b"TAO")
+        self.assertEqual(bytes(out), b"".join(MERGED_RESULT))
+        self.assertTrue(m3.conflicts)
+
     def test_binary(self):
         with self.assertRaises(error.Abort):
             Merge3([b"\x00"], [b"a"], [b"b"])
@@ -381,16 +454,18 @@ import {cached, LRU} from 'shared/LRU';
 import {List, Record} from 'immutable';
 import {cached, LRU} from 'shared/LRU';
 """
-        m3 = Merge3(
-            base_text.splitlines(True),
-            other_text.splitlines(True),
-            this_text.splitlines(True),
-            wordmerge=wordmergemode.ondemand,
-        )
-        m_lines = m3.merge_lines(b"OTHER", b"THIS")
-        self.assertEqual(expected.splitlines(True), list(m_lines))
-        self.assertFalse(m3.conflicts)
-        self.assertEqual(0, m3.conflictscount)
+        for diffalgorithm in [None, "histogram"]:
+            m3 = Merge3(
+                base_text.splitlines(True),
+                other_text.splitlines(True),
+                this_text.splitlines(True),
+                wordmerge=wordmergemode.ondemand,
+                diffalgorithm=diffalgorithm,
+            )
+            m_lines = m3.merge_lines(b"OTHER", b"THIS")
+            self.assertEqual(expected.splitlines(True), list(m_lines))
+            self.assertFalse(m3.conflicts)
+            self.assertEqual(0, m3.conflictscount)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+  $ setconfig extensions.smerge_benchmark=$TESTDIR/../contrib/smerge_benchmark.py
+
+Prepare a merge touching files in different ways:
+- "two" is changed by B, changed and then reverted by C: the merge takes B
+- "three" is only reverted by C, so it has a new filenode but no change; the
+  merge commit edits it to get it listed in the merge's files
+- "four" is changed on both sides in a conflicting way
+- "five" is changed on both sides and merges cleanly
+
+  $ newrepo
+  $ drawdag << 'EOS'
+  > M      # drawdag.defaultfiles=false
+  > |\     # A/two = 1\n2\n3\n
+  > B C2   # A/three = 1\n2\n3\n
+  > | |    # A/four = 1\n2\n3\n
+  > | C1   # A/five = 1\n2\n3\n4\n5\n
+  > |/     # B/two = 1\nb\n3\n
+  > A      # B/four = 1\nb\n3\n
+  >        # B/five = b\n2\n3\n4\n5\n
+  >        # C1/two = 1\nc\n3\n
+  >        # C1/three = 1\nc\n3\n
+  >        # C1/four = 1\nc\n3\n
+  >        # C1/five = 1\n2\n3\n4\nc\n
+  >        # C2/two = 1\n2\n3\n
+  >        # C2/three = 1\n2\n3\n
+  >        # M/two = 1\nb\n3\n
+  >        # M/three = 1\nm\n3\n
+  >        # M/four = 1\nm\n3\n
+  >        # M/five = b\n2\n3\n4\nc\n
+  > EOS
+
+Only "two", "four" and "five" count as changed, and only "four" is unresolved:
+
+  $ hg smerge_bench
+  len(merge_commits)=1
+  
+  ============== SmartMerge3Text ==============
+  
+  Summary: BenchStats(changed_files=3, unresolved_files=1, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+  
+  ============== Merge3Text ==============
+  
+  Summary: BenchStats(changed_files=3, unresolved_files=1, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+
+smerge_batch only looks at the given merge commits, and skips other commits:
+
+  $ hg smerge_batch $B $M
+  len(merge_commits)=1
+  
+  ============== SmartMerge3Text ==============
+  
+  Summary: BenchStats(changed_files=3, unresolved_files=1, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+  
+  ============== Merge3Text ==============
+  
+  Summary: BenchStats(changed_files=3, unresolved_files=1, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+
+  $ hg smerge_batch -r $C1
+  len(merge_commits)=0
+  
+  ============== SmartMerge3Text ==============
+  
+  Summary: BenchStats(changed_files=0, unresolved_files=0, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+  
+  ============== Merge3Text ==============
+  
+  Summary: BenchStats(changed_files=0, unresolved_files=0, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+
+Without revisions, smerge_batch reads them from stdin:
+
+  $ printf '%s\n\n%s\n' $M $C2 | hg smerge_batch
+  len(merge_commits)=1
+  
+  ============== SmartMerge3Text ==============
+  
+  Summary: BenchStats(changed_files=3, unresolved_files=1, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+  
+  ============== Merge3Text ==============
+  
+  Summary: BenchStats(changed_files=3, unresolved_files=1, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+
+#if git no-windows
+
+In git repos, a merge taking one side of a file reuses that side's blob. Each
+of "one" and "uno" is only changed on one side, so whichever one the merge
+took from its second parent is listed in the merge's files:
+
+  $ cd $TESTTMP
+  $ . $TESTDIR/git.sh
+  $ hg init --git gitrepo
+  $ cd gitrepo
+  $ drawdag << 'EOS'
+  > M     # drawdag.defaultfiles=false
+  > |\    # A/one = 1\n2\n3\n
+  > B C   # A/uno = 1\n2\n3\n
+  > |/    # B/one = 1\nb\n3\n
+  > A     # C/uno = 1\nc\n3\n
+  >       # M/one = 1\nb\n3\n
+  >       # M/uno = 1\nc\n3\n
+  > EOS
+
+  $ hg smerge_batch $M
+  len(merge_commits)=1
+  
+  ============== SmartMerge3Text ==============
+  
+  Summary: BenchStats(changed_files=1, unresolved_files=0, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+  
+  ============== Merge3Text ==============
+  
+  Summary: BenchStats(changed_files=1, unresolved_files=0, unmatched_files=0, octopus_merges=0, criss_cross_merges=0)
+  Execution time: * seconds (glob)
+
+#endif